@@ -4,8 +4,6 @@ Demand Forecasting, Inventory Optimization, and Schedule Planning System
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
 from pathlib import Path
 import sys
 from datetime import datetime
@@ -21,8 +19,8 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
+# Static page content (named for readability; re-evaluated on every Streamlit rerun)
+CUSTOM_CSS = """
     <style>
     .main-header {
         font-size: 2.5rem;
@@ -41,7 +39,26 @@ st.markdown("""
         width: 100%;
     }
     </style>
-""", unsafe_allow_html=True)
+"""
+
+HOME_INTRO = """
+    ### Welcome to the Spare Parts Demand Forecasting & Inventory Optimization System
+    
+    This comprehensive system provides end-to-end solutions for:
+    - **Demand Forecasting**: ML-powered demand prediction with pattern classification
+    - **Inventory Optimization**: Safety stock, reorder points, and EOQ calculations
+    - **Schedule Planning**: Automated procurement and replenishment scheduling
+    """
+
+QUICK_START = """
+    1. **Upload Data**: Go to Demand Forecasting section and upload your sales data
+    2. **Generate Forecasts**: Run the forecasting pipeline to get demand predictions
+    3. **Optimize Inventory**: Use Inventory Optimization to calculate optimal parameters
+    4. **Plan Schedules**: Generate procurement and replenishment schedules
+    """
+
+# Custom CSS (must be emitted on every rerun; Streamlit drops elements not re-rendered)
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
 
 # Initialize session state
 if 'data_loaded' not in st.session_state:
@@ -58,14 +75,7 @@ def home_page():
     """Home page with overview and key metrics"""
     st.markdown('<div class="main-header">🔧 Spare Parts Management System</div>', unsafe_allow_html=True)
     
-    st.markdown("""
-    ### Welcome to the Spare Parts Demand Forecasting & Inventory Optimization System
-    
-    This comprehensive system provides end-to-end solutions for:
-    - **Demand Forecasting**: ML-powered demand prediction with pattern classification
-    - **Inventory Optimization**: Safety stock, reorder points, and EOQ calculations
-    - **Schedule Planning**: Automated procurement and replenishment scheduling
-    """)
+    st.markdown(HOME_INTRO)
     
     # Key metrics section
     st.markdown("### 📊 Key Metrics Summary")
@@ -87,12 +97,7 @@ def home_page():
     # Quick start guide
     st.markdown("### 🚀 Quick Start Guide")
     
-    st.markdown("""
-    1. **Upload Data**: Go to Demand Forecasting section and upload your sales data
-    2. **Generate Forecasts**: Run the forecasting pipeline to get demand predictions
-    3. **Optimize Inventory**: Use Inventory Optimization to calculate optimal parameters
-    4. **Plan Schedules**: Generate procurement and replenishment schedules
-    """)
+    st.markdown(QUICK_START)
     
     # System status
     st.markdown("### ⚙️ System Status")
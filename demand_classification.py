@@ -6,79 +6,190 @@ Based on CV (Coefficient of Variation) and ADI (Average Demand Interval)
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+from pyarrow import csv as pa_csv
+import pyarrow.parquet as pq
 import os
+import argparse
+import csv
 from pathlib import Path
 import json
 from datetime import datetime
 
+try:
+    from numba import njit
+except ImportError:  # Optional: falls back to pandas groupby aggregation
+    njit = None
+
 # Configuration
 PROCESSED_DATA_DIR = Path("processed_data")
 INPUT_FILE = PROCESSED_DATA_DIR / "encoded_dataset_model_ready.csv"
-OUTPUT_FILE = PROCESSED_DATA_DIR / "classified_demand_dataset.csv"
+OUTPUT_FILE = PROCESSED_DATA_DIR / "classified_demand_dataset.parquet"
+CLASSIFICATION_TABLE_FILE = PROCESSED_DATA_DIR / "demand_classification_table.parquet"
 REPORT_FILE = PROCESSED_DATA_DIR / "demand_classification_report.txt"
 
 # Classification thresholds
 CV_THRESHOLD = 0.5
 ADI_THRESHOLD = 1.32
 
+# Bump when the classification logic changes so cached outputs are rebuilt
+CLASSIFICATION_VERSION = "1"
+
+# Demand pattern categories:
+# - Smooth: CV < 0.5, ADI < 1.32
+# - Erratic: CV >= 0.5, ADI < 1.32
+# - Intermittent: CV < 0.5, ADI >= 1.32
+# - Lumpy: CV >= 0.5, ADI >= 1.32
+# - Unknown: CV or ADI undefined
+# Labels are indexed by code: bit 0 = CV >= threshold, bit 1 = ADI >= threshold, 4 = Unknown
+PATTERN_LABELS = ['Smooth', 'Erratic', 'Intermittent', 'Lumpy', 'Unknown']
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _group_stats_kernel(values, row_group, n_groups):
+        """
+        Per-group total, mean, population std, period count and count of
+        periods with demand > 0. Missing (NaN) values are skipped; the std
+        is taken from squared deviations about the group mean (second pass)
+        """
+        total = np.zeros(n_groups)
+        count = np.zeros(n_groups, dtype=np.int64)
+        positive = np.zeros(n_groups, dtype=np.int64)
+        for i in range(values.shape[0]):
+            g = row_group[i]
+            if g < 0 or g >= n_groups:
+                raise ValueError("group number out of range")
+            v = values[i]
+            if np.isnan(v):
+                continue
+            total[g] += v
+            count[g] += 1
+            if v > 0:
+                positive[g] += 1
+        
+        mean = np.full(n_groups, np.nan)
+        for g in range(n_groups):
+            if count[g] > 0:
+                mean[g] = total[g] / count[g]
+        
+        sq_dev = np.zeros(n_groups)
+        for i in range(values.shape[0]):
+            v = values[i]
+            if not np.isnan(v):
+                g = row_group[i]
+                sq_dev[g] += (v - mean[g]) * (v - mean[g])
+        
+        std = np.full(n_groups, np.nan)
+        for g in range(n_groups):
+            if count[g] > 0:
+                std[g] = np.sqrt(sq_dev[g] / count[g])
+        return total, mean, std, count, positive
 
-def calculate_cv(demand_series):
+
+def group_demand_statistics(grouped, row_group):
     """
-    Calculate Coefficient of Variation (CV)
-    CV = Standard Deviation / Mean
+    Per-group demand statistics: total, mean, population std (ddof=0),
+    number of periods and number of periods with demand > 0
+    
+    Missing quantities are skipped: they add nothing to the totals and do
+    not count as periods. Uses a fused Numba kernel when numba is installed,
+    otherwise pandas groupby aggregation.
     """
-    if len(demand_series) == 0 or demand_series.sum() == 0:
-        return np.nan
+    if njit is None:
+        stats = grouped.agg(
+            total_demand=('quantity', 'sum'),
+            mean_demand=('quantity', 'mean'),
+            total_periods=('quantity', 'count'),
+            periods_with_demand=('has_demand', 'sum')
+        )
+        # Population std (ddof=0), matching the per-series numpy calculation
+        stats['std_demand'] = grouped['quantity'].std(ddof=0)
+        return stats
     
-    mean_demand = demand_series.mean()
-    if mean_demand == 0:
-        return np.nan
+    # Group keys in ngroup order; records outside any group (null keys) are dropped
+    stats = grouped.size().to_frame('total_periods')
+    in_group = row_group >= 0
+    values = grouped.obj['quantity'].to_numpy(dtype=np.float64)[in_group]
+    total, mean, std, count, positive = _group_stats_kernel(
+        values, row_group[in_group], len(stats)
+    )
+    stats['total_demand'] = total
+    stats['mean_demand'] = mean
+    stats['total_periods'] = count
+    stats['periods_with_demand'] = positive
+    stats['std_demand'] = std
+    return stats
+
+
+def decode_location_columns(df, location_cols):
+    """
+    Rebuild location IDs from one-hot encoded location columns
     
-    std_demand = demand_series.std()
-    cv = std_demand / mean_demand if mean_demand > 0 else np.nan
-    return cv
+    argmax gives the first hot column per row; rows where it is not hot are
+    all-zero, the dropped baseline LOC_001. With 'LOC_001' prepended to the
+    names, (index + 1) * hot indexes the location name directly
+    (e.g. 'location_id_LOC_002' -> 'LOC_002').
+    """
+    loc_matrix = df[location_cols].to_numpy(dtype=np.int8)
+    hot_index = loc_matrix.argmax(axis=1)
+    is_hot = loc_matrix[np.arange(len(loc_matrix)), hot_index] != 0
+    location_names = np.array(['LOC_001'] + [col.replace('location_id_', '') for col in location_cols])
+    return location_names[(hot_index + 1) * is_hot]
 
 
-def calculate_adi(demand_series, date_series):
+def group_by_sku_location(df):
     """
-    Calculate Average Demand Interval (ADI)
-    ADI = Number of periods / Number of periods with demand > 0
+    Group quantities by SKU-Location
+    
+    Returns the groupby (quantity and has_demand columns) and the group number
+    of each record, in the same order as the aggregated groups. Records with a
+    null part_sku/location_id belong to no group and get -1.
+    """
+    quantity = df['quantity_sold'].astype(np.float64)
+    grouped = pd.DataFrame({'quantity': quantity, 'has_demand': quantity > 0}).groupby(
+        [df['part_sku'], df['location_id']], sort=False, observed=True
+    )
+    row_group = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    return grouped, row_group
+
+
+def finalize_classification(stats):
     """
-    if len(demand_series) == 0:
-        return np.nan
+    Derive CV, ADI, zero demand ratio and demand pattern from per-group statistics
+    
+    CV = Standard Deviation / Mean
+    ADI = Number of periods / Number of periods with demand > 0
     
-    # Count periods with positive demand
-    periods_with_demand = (demand_series > 0).sum()
+    Returns the classification table and the pattern code of each group.
+    """
+    # CV = std / mean, ADI = periods / periods with demand > 0 (NaN when undefined)
+    stats['cv'] = stats['std_demand'] / stats['mean_demand'].where(stats['mean_demand'] > 0)
+    stats['adi'] = stats['total_periods'] / stats['periods_with_demand'].where(stats['periods_with_demand'] > 0)
+    stats['zero_demand_ratio'] = 1 - stats['periods_with_demand'] / stats['total_periods']
     
-    if periods_with_demand == 0:
-        return np.nan
+    # Classify pattern column-wise via the 2-bit code into PATTERN_LABELS
+    cv = stats['cv'].to_numpy()
+    adi = stats['adi'].to_numpy()
+    code = (cv >= CV_THRESHOLD).astype(np.uint8) | ((adi >= ADI_THRESHOLD).astype(np.uint8) << 1)
+    code[np.isnan(cv) | np.isnan(adi)] = 4
+    stats['demand_pattern'] = pd.Categorical.from_codes(code, PATTERN_LABELS)
     
-    total_periods = len(demand_series)
-    adi = total_periods / periods_with_demand if periods_with_demand > 0 else np.nan
-    return adi
+    classification_df = stats.reset_index()[[
+        'part_sku', 'location_id', 'cv', 'adi', 'demand_pattern',
+        'total_demand', 'mean_demand', 'std_demand',
+        'periods_with_demand', 'total_periods', 'zero_demand_ratio'
+    ]]
+    return classification_df, code
 
 
-def classify_demand_pattern(cv, adi):
+def print_skipped_records(missing_keys):
     """
-    Classify demand pattern based on CV and ADI thresholds
-    
-    Categories:
-    - Smooth: CV < 0.5, ADI < 1.32
-    - Erratic: CV >= 0.5, ADI < 1.32
-    - Intermittent: CV < 0.5, ADI >= 1.32
-    - Lumpy: CV >= 0.5, ADI >= 1.32
+    Report records left out of classification because of a null key
     """
-    if pd.isna(cv) or pd.isna(adi):
-        return "Unknown"
-    
-    if cv < CV_THRESHOLD and adi < ADI_THRESHOLD:
-        return "Smooth"
-    elif cv >= CV_THRESHOLD and adi < ADI_THRESHOLD:
-        return "Erratic"
-    elif cv < CV_THRESHOLD and adi >= ADI_THRESHOLD:
-        return "Intermittent"
-    else:  # cv >= 0.5 and adi >= 1.32
-        return "Lumpy"
+    if missing_keys:
+        print(f"Skipping {missing_keys:,} records with missing part_sku/location_id "
+              f"(left unclassified)")
 
 
 def classify_demand_patterns(df):
@@ -89,101 +200,139 @@ def classify_demand_patterns(df):
     print("DEMAND PATTERN CLASSIFICATION")
     print("=" * 80)
     
-    # Ensure date column is datetime
-    df['date'] = pd.to_datetime(df['date'])
-    
     # Reconstruct location_id from one-hot encoded columns
     location_cols = [col for col in df.columns if col.startswith('location_id_LOC_')]
     if location_cols and 'location_id' not in df.columns:
         print(f"Reconstructing location_id from {len(location_cols)} one-hot encoded columns...")
-        # Find which location column is 1 for each row
-        location_values = []
-        for idx, row in df.iterrows():
-            location = None
-            for loc_col in location_cols:
-                if row[loc_col] == 1:
-                    # Extract location ID from column name (e.g., 'location_id_LOC_002' -> 'LOC_002')
-                    location = loc_col.replace('location_id_', '')
-                    break
-            # If no location found, default to first location or create a default
-            if location is None:
-                # Check if all are 0, might be LOC_001 (baseline)
-                if all(row[loc_col] == 0 for loc_col in location_cols):
-                    location = 'LOC_001'  # Assuming first location is baseline
-                else:
-                    location = 'LOC_001'  # Default fallback
-            location_values.append(location)
-        df['location_id'] = location_values
+        df['location_id'] = decode_location_columns(df, location_cols)
         print(f"Reconstructed location_id. Unique locations: {df['location_id'].nunique()}")
     
-    # Sort by SKU, Location, and Date
-    df = df.sort_values(['part_sku', 'location_id', 'date']).reset_index(drop=True)
+    # Categorical keys: groupby/merge work on integer codes instead of hashing strings
+    for col in ('part_sku', 'location_id'):
+        df[col] = df[col].astype('category')
+    
+    # No sort needed: CV/ADI statistics are independent of record order within a group.
+    # Consumers that need chronological order should sort their own slice by date.
     
     # Group by SKU-Location and calculate metrics
-    classification_results = []
+    grouped, row_group = group_by_sku_location(df)
+    in_group = row_group >= 0
+    print_skipped_records(len(row_group) - np.count_nonzero(in_group))
+    stats = group_demand_statistics(grouped, row_group)
+    classification_df, code = finalize_classification(stats)
     
-    for (sku, location), group in df.groupby(['part_sku', 'location_id']):
-        # Get demand series (quantity_sold)
-        demand_series = group['quantity_sold'].values
-        date_series = group['date'].values
-        
-        # Calculate CV and ADI
-        cv = calculate_cv(demand_series)
-        adi = calculate_adi(demand_series, date_series)
-        
-        # Classify pattern
-        pattern = classify_demand_pattern(cv, adi)
-        
-        # Calculate additional statistics
-        total_demand = demand_series.sum()
-        mean_demand = demand_series.mean()
-        std_demand = demand_series.std()
-        periods_with_demand = (demand_series > 0).sum()
-        total_periods = len(demand_series)
-        zero_demand_ratio = 1 - (periods_with_demand / total_periods) if total_periods > 0 else 0
-        
-        classification_results.append({
-            'part_sku': sku,
-            'location_id': location,
-            'cv': cv,
-            'adi': adi,
-            'demand_pattern': pattern,
-            'total_demand': total_demand,
-            'mean_demand': mean_demand,
-            'std_demand': std_demand,
-            'periods_with_demand': periods_with_demand,
-            'total_periods': total_periods,
-            'zero_demand_ratio': zero_demand_ratio
-        })
-    
-    classification_df = pd.DataFrame(classification_results)
-    
-    # Merge classification back to original dataset
-    df_classified = df.merge(
-        classification_df[['part_sku', 'location_id', 'demand_pattern', 'cv', 'adi']],
-        on=['part_sku', 'location_id'],
-        how='left'
-    )
+    # Broadcast classification back to every record by gathering on group number;
+    # ungrouped records keep a missing pattern and NaN cv/adi
+    pattern_codes = np.full(len(row_group), -1, dtype=np.int8)
+    pattern_codes[in_group] = code[row_group[in_group]]
+    df_classified = df.copy(deep=False)
+    df_classified['demand_pattern'] = pd.Categorical.from_codes(pattern_codes, PATTERN_LABELS)
+    for col in ('cv', 'adi'):
+        values = np.full(len(row_group), np.nan)
+        values[in_group] = stats[col].to_numpy()[row_group[in_group]]
+        df_classified[col] = values
     
     return df_classified, classification_df
 
 
-def generate_classification_report(classification_df, df_classified):
+def merge_group_moments(acc, batch):
+    """
+    Combine per-group count, total, positive count, mean and sum of squared
+    deviations (m2) of two record batches (Chan et al. parallel update)
+    """
+    acc, batch = acc.align(batch, fill_value=0)
+    n = acc['total_periods'] + batch['total_periods']
+    delta = batch['mean_demand'] - acc['mean_demand']
+    batch_share = (batch['total_periods'] / n).where(n > 0, 0)
+    merged = acc[['total_periods', 'periods_with_demand', 'total_demand']] + \
+        batch[['total_periods', 'periods_with_demand', 'total_demand']]
+    merged['mean_demand'] = acc['mean_demand'] + delta * batch_share
+    merged['m2'] = acc['m2'] + batch['m2'] + delta * delta * acc['total_periods'] * batch_share
+    return merged
+
+
+def classify_demand_patterns_streaming(path, block_size=64 << 20):
+    """
+    Classify demand patterns per SKU-Location without loading the whole file
+    
+    Reads the CSV in record batches, computes per-group statistics for each
+    batch and merges them into running totals, so peak memory grows with the
+    number of SKU-Locations rather than the number of records. Applies the
+    same rules as classify_demand_patterns (missing quantities skipped,
+    demand means quantity > 0) and returns only the classification table;
+    records with a null part_sku/location_id are skipped.
+    """
+    header = read_csv_header(path)
+    location_cols = [col for col in header if col.startswith('location_id_LOC_')]
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(block_size=block_size),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=csv_column_types(header, dictionary_keys=False),
+            include_columns=['part_sku', 'quantity_sold'] + (
+                location_cols if 'location_id' not in header else ['location_id']
+            ),
+            strings_can_be_null=True
+        )
+    )
+    
+    acc = pd.DataFrame(
+        {
+            'total_periods': np.array([], dtype=np.int64),
+            'periods_with_demand': np.array([], dtype=np.int64),
+            'total_demand': np.array([], dtype=np.float64),
+            'mean_demand': np.array([], dtype=np.float64),
+            'm2': np.array([], dtype=np.float64)
+        },
+        index=pd.MultiIndex.from_arrays([[], []], names=['part_sku', 'location_id'])
+    )
+    missing_keys = 0
+    for batch in reader:
+        chunk = batch.to_pandas()
+        if 'location_id' not in chunk.columns:
+            chunk['location_id'] = decode_location_columns(chunk, location_cols)
+        grouped, row_group = group_by_sku_location(chunk)
+        missing_keys += len(row_group) - np.count_nonzero(row_group >= 0)
+        batch_stats = group_demand_statistics(grouped, row_group)
+        # Groups whose quantities are all missing contribute nothing
+        batch_stats['m2'] = batch_stats['std_demand'] ** 2 * batch_stats['total_periods']
+        batch_stats = batch_stats.fillna({'mean_demand': 0, 'm2': 0})
+        acc = merge_group_moments(acc, batch_stats)
+    print_skipped_records(missing_keys)
+    
+    stats = acc.astype({'total_periods': np.int64, 'periods_with_demand': np.int64})
+    stats['mean_demand'] = stats['total_demand'] / stats['total_periods']
+    # Population std (ddof=0); NaN for groups without any quantity
+    stats['std_demand'] = np.sqrt(stats.pop('m2') / stats['total_periods'])
+    classification_df, _ = finalize_classification(stats)
+    for col in ('part_sku', 'location_id'):
+        classification_df[col] = classification_df[col].astype('category')
+    return classification_df
+
+
+def generate_classification_report(classification_df, df_classified=None, signature=None):
     """
     Generate detailed classification distribution report
+    
+    Without df_classified (streaming mode), the dataset-level and record-level
+    figures are derived from classification_df and count only records with a
+    SKU-Location and a quantity. The run signature, when given, is recorded so a later run can tell
+    whether the report is up to date.
     """
     report_lines = []
     report_lines.append("=" * 80)
     report_lines.append("DEMAND PATTERN CLASSIFICATION REPORT")
     report_lines.append("=" * 80)
     report_lines.append(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    if signature is not None:
+        report_lines.append(f"Run signature: {signature}")
     report_lines.append("")
     
     # Overall distribution
     report_lines.append("CLASSIFICATION DISTRIBUTION")
     report_lines.append("-" * 80)
-    pattern_counts = classification_df['demand_pattern'].value_counts()
-    pattern_pct = classification_df['demand_pattern'].value_counts(normalize=True) * 100
+    pattern_counts = classification_df['demand_pattern'].value_counts(sort=False)
+    pattern_pct = (pattern_counts / pattern_counts.sum() * 100).fillna(0)
     
     for pattern in ['Smooth', 'Erratic', 'Intermittent', 'Lumpy', 'Unknown']:
         count = pattern_counts.get(pattern, 0)
@@ -198,31 +347,45 @@ def generate_classification_report(classification_df, df_classified):
     report_lines.append("STATISTICS BY DEMAND PATTERN")
     report_lines.append("-" * 80)
     
+    # One grouped pass for all per-pattern means
+    pattern_stats = classification_df.groupby('demand_pattern', sort=False, observed=True)[
+        ['cv', 'adi', 'total_demand', 'zero_demand_ratio']
+    ].mean()
+    
     for pattern in ['Smooth', 'Erratic', 'Intermittent', 'Lumpy']:
-        pattern_data = classification_df[classification_df['demand_pattern'] == pattern]
-        if len(pattern_data) > 0:
+        if pattern in pattern_stats.index:
+            stats = pattern_stats.loc[pattern]
             report_lines.append(f"\n{pattern} Demand:")
-            report_lines.append(f"  Count: {len(pattern_data)}")
-            report_lines.append(f"  Mean CV: {pattern_data['cv'].mean():.4f}")
-            report_lines.append(f"  Mean ADI: {pattern_data['adi'].mean():.4f}")
-            report_lines.append(f"  Mean Total Demand: {pattern_data['total_demand'].mean():.2f}")
-            report_lines.append(f"  Mean Zero Demand Ratio: {pattern_data['zero_demand_ratio'].mean():.4f}")
+            report_lines.append(f"  Count: {pattern_counts[pattern]}")
+            report_lines.append(f"  Mean CV: {stats['cv']:.4f}")
+            report_lines.append(f"  Mean ADI: {stats['adi']:.4f}")
+            report_lines.append(f"  Mean Total Demand: {stats['total_demand']:.2f}")
+            report_lines.append(f"  Mean Zero Demand Ratio: {stats['zero_demand_ratio']:.4f}")
     
     # Dataset-level statistics
     report_lines.append("")
     report_lines.append("DATASET-LEVEL STATISTICS")
     report_lines.append("-" * 80)
-    report_lines.append(f"Total records: {len(df_classified):,}")
-    report_lines.append(f"Unique SKUs: {df_classified['part_sku'].nunique()}")
-    report_lines.append(f"Unique Locations: {df_classified['location_id'].nunique()}")
+    records = classification_df if df_classified is None else df_classified
+    total_records = (
+        classification_df['total_periods'].sum() if df_classified is None else len(df_classified)
+    )
+    report_lines.append(f"Total records: {total_records:,}")
+    report_lines.append(f"Unique SKUs: {records['part_sku'].nunique()}")
+    report_lines.append(f"Unique Locations: {records['location_id'].nunique()}")
     report_lines.append(f"Unique SKU-Location combinations: {len(classification_df)}")
     
     # Pattern distribution in records
     report_lines.append("")
     report_lines.append("RECORD-LEVEL PATTERN DISTRIBUTION")
     report_lines.append("-" * 80)
-    record_pattern_counts = df_classified['demand_pattern'].value_counts()
-    record_pattern_pct = df_classified['demand_pattern'].value_counts(normalize=True) * 100
+    if df_classified is None:
+        record_pattern_counts = classification_df.groupby(
+            'demand_pattern', sort=False, observed=True
+        )['total_periods'].sum()
+    else:
+        record_pattern_counts = df_classified['demand_pattern'].value_counts(sort=False)
+    record_pattern_pct = (record_pattern_counts / record_pattern_counts.sum() * 100).fillna(0)
     
     for pattern in ['Smooth', 'Erratic', 'Intermittent', 'Lumpy', 'Unknown']:
         count = record_pattern_counts.get(pattern, 0)
@@ -235,30 +398,166 @@ def generate_classification_report(classification_df, df_classified):
     return "\n".join(report_lines)
 
 
-def main():
+def read_csv_header(path):
     """
-    Main execution function
+    Column names from the first line of a CSV file (handles quoting and a UTF-8 BOM)
     """
-    print("Loading dataset...")
-    df = pd.read_csv(INPUT_FILE)
-    print(f"Loaded {len(df):,} records")
-    print(f"Columns: {len(df.columns)}")
+    with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f), [])
+
+
+def csv_column_types(header, dictionary_keys=True):
+    """
+    PyArrow column types for the encoded dataset: int8 one-hot location flags,
+    float32 quantities, pre-parsed dates and (optionally dictionary-encoded) keys
+    """
+    column_types = {col: pa.int8() for col in header if col.startswith('location_id_LOC_')}
+    column_types['quantity_sold'] = pa.float32()
+    column_types['date'] = pa.timestamp('ns')
+    key_type = pa.dictionary(pa.int32(), pa.string()) if dictionary_keys else pa.string()
+    for col in ('part_sku', 'location_id'):
+        if col in header:
+            column_types[col] = key_type
+    return column_types
+
+
+def load_dataset(path):
+    """
+    Load the encoded dataset with PyArrow's multi-threaded CSV reader
     
-    # Classify demand patterns
-    print("\nClassifying demand patterns...")
-    df_classified, classification_df = classify_demand_patterns(df)
+    Uses a tight schema: int8 one-hot location flags, float32 quantities,
+    dictionary-encoded (categorical) keys and pre-parsed dates. Empty key
+    cells are read as missing values.
+    """
+    table = pa_csv.read_csv(
+        path,
+        convert_options=pa_csv.ConvertOptions(
+            column_types=csv_column_types(read_csv_header(path)),
+            strings_can_be_null=True
+        )
+    )
+    return table.to_pandas()
+
+
+def input_signature(path):
+    """
+    Cheap change signature of an input file (mtime + size)
+    """
+    stat = Path(path).stat()
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def classification_signature(path, streaming=False):
+    """
+    Signature of a classification run: input file signature plus the
+    thresholds, CLASSIFICATION_VERSION and run mode, so changing any of them
+    invalidates cached outputs
+    """
+    return (f"{input_signature(path)}|cv={CV_THRESHOLD}|adi={ADI_THRESHOLD}"
+            f"|v={CLASSIFICATION_VERSION}|mode={'streaming' if streaming else 'full'}")
+
+
+def is_output_current(output_file, signature):
+    """
+    Check whether output_file and REPORT_FILE were both produced by a run
+    with the given signature (reads only the Parquet footer and the report)
     
-    # Save classified dataset
-    print(f"\nSaving classified dataset to {OUTPUT_FILE}...")
-    df_classified.to_csv(OUTPUT_FILE, index=False)
-    print(f"Saved {len(df_classified):,} records")
+    Missing, corrupt or truncated outputs count as out of date.
+    """
+    if not output_file.exists() or not REPORT_FILE.exists():
+        return False
+    try:
+        metadata = pq.read_metadata(output_file).metadata or {}
+    except (pa.ArrowInvalid, OSError):
+        return False
+    if metadata.get(b'src_sig') != signature.encode():
+        return False
+    with open(REPORT_FILE, 'r', errors='replace') as f:
+        return f"Run signature: {signature}" in f.read().splitlines()
+
+
+def write_atomically(path, write):
+    """
+    Call write() on a temporary file next to path, then move it into place,
+    so an interrupted run never leaves a partial file at path
+    """
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def save_parquet(df, output_file, signature):
+    """
+    Write a frame as zstd Parquet, embedding the run signature
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'src_sig'] = signature.encode()
+    table = table.replace_schema_metadata(metadata)
+    write_atomically(
+        output_file,
+        lambda tmp_path: pq.write_table(table, tmp_path, compression='zstd')
+    )
+
+
+def save_report(report):
+    """
+    Write the classification report to REPORT_FILE
+    """
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            f.write(report)
+    write_atomically(REPORT_FILE, write)
+
+
+def main(force=False, streaming=False):
+    """
+    Main execution function
+    
+    With streaming=True, INPUT_FILE is classified in record batches and only
+    the per-SKU-Location table is written (CLASSIFICATION_TABLE_FILE), not the
+    record-level dataset. Skips recomputation when the existing outputs were
+    built from an unchanged INPUT_FILE with the same thresholds,
+    classification version and mode, unless force=True.
+    """
+    output_file = CLASSIFICATION_TABLE_FILE if streaming else OUTPUT_FILE
+    signature = classification_signature(INPUT_FILE, streaming)
+    if not force and is_output_current(output_file, signature):
+        print(f"{output_file} is up to date with {INPUT_FILE}, skipping classification "
+              f"(use --force to recompute).")
+        return
+    
+    if streaming:
+        print(f"Classifying demand patterns in batches from {INPUT_FILE}...")
+        classification_df = classify_demand_patterns_streaming(INPUT_FILE)
+        df_classified = None
+        
+        print(f"\nSaving classification table to {output_file}...")
+        save_parquet(classification_df, output_file, signature)
+        print(f"Saved {len(classification_df):,} SKU-Locations")
+    else:
+        print("Loading dataset...")
+        df = load_dataset(INPUT_FILE)
+        print(f"Loaded {len(df):,} records")
+        print(f"Columns: {len(df.columns)}")
+        
+        # Classify demand patterns
+        print("\nClassifying demand patterns...")
+        df_classified, classification_df = classify_demand_patterns(df)
+        
+        # Save classified dataset
+        print(f"\nSaving classified dataset to {output_file}...")
+        save_parquet(df_classified, output_file, signature)
+        print(f"Saved {len(df_classified):,} records")
     
     # Generate and save report
     print("\nGenerating classification report...")
-    report = generate_classification_report(classification_df, df_classified)
-    
-    with open(REPORT_FILE, 'w') as f:
-        f.write(report)
+    report = generate_classification_report(classification_df, df_classified, signature)
+    save_report(report)
     
     print(f"Report saved to {REPORT_FILE}")
     
@@ -268,10 +567,20 @@ def main():
     print("=" * 80)
     print(classification_df['demand_pattern'].value_counts())
     print("\nClassification complete!")
-    print(f"Output file: {OUTPUT_FILE}")
+    print(f"Output file: {output_file}")
     print(f"Report file: {REPORT_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Classify demand patterns per SKU-Location")
+    parser.add_argument(
+        '--force', action='store_true',
+        help="recompute even if the existing outputs are up to date"
+    )
+    parser.add_argument(
+        '--streaming', action='store_true',
+        help="classify the input in batches and write only the per-SKU-Location table"
+    )
+    args = parser.parse_args()
+    main(force=args.force, streaming=args.streaming)
 
@@ -0,0 +1,265 @@
+"""
+Tests for demand pattern classification
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import demand_classification as dc
+
+KEYS = ['part_sku', 'location_id']
+
+
+def make_frame():
+    """
+    Small dataset covering missing quantities, null keys, all-zero and
+    all-missing groups, negative quantities and a large-offset series
+    """
+    rows = [
+        ('A', 'LOC_001', [5, 0, 7, 0, 0, 3]),
+        ('B', 'LOC_001', [3, np.nan, 2]),
+        ('C', 'LOC_002', [1e8, 1e8 + 1, 1e8]),
+        ('D', 'LOC_001', [0, 0, 0]),
+        ('E', 'LOC_002', [np.nan, np.nan]),
+        ('F', 'LOC_002', [3, -2]),
+        ('G', 'LOC_001', [4, 4, 4, 4]),
+        (None, 'LOC_001', [5, 1]),
+        ('A', None, [2]),
+    ]
+    records = []
+    for sku, location, quantities in rows:
+        for i, quantity in enumerate(quantities):
+            records.append({
+                'date': f'2024-01-{i + 1:02d}',
+                'part_sku': sku,
+                'location_id': location,
+                'quantity_sold': quantity,
+            })
+    return pd.DataFrame(records)
+
+
+def reference_classification(df):
+    """
+    The original per-group loop (missing quantities dropped first)
+    """
+    results = []
+    for (sku, location), group in df.groupby(KEYS):
+        demand = group['quantity_sold'].dropna().to_numpy(dtype=np.float64)
+        if len(demand) == 0 or demand.sum() == 0 or demand.mean() <= 0:
+            cv = np.nan
+        else:
+            cv = demand.std() / demand.mean()
+        periods_with_demand = (demand > 0).sum()
+        adi = len(demand) / periods_with_demand if periods_with_demand > 0 else np.nan
+        if pd.isna(cv) or pd.isna(adi):
+            pattern = 'Unknown'
+        elif cv < dc.CV_THRESHOLD and adi < dc.ADI_THRESHOLD:
+            pattern = 'Smooth'
+        elif cv >= dc.CV_THRESHOLD and adi < dc.ADI_THRESHOLD:
+            pattern = 'Erratic'
+        elif cv < dc.CV_THRESHOLD and adi >= dc.ADI_THRESHOLD:
+            pattern = 'Intermittent'
+        else:
+            pattern = 'Lumpy'
+        results.append({
+            'part_sku': sku,
+            'location_id': location,
+            'cv': cv,
+            'adi': adi,
+            'demand_pattern': pattern,
+            'total_periods': len(demand),
+            'periods_with_demand': periods_with_demand,
+        })
+    return pd.DataFrame(results).set_index(KEYS).sort_index()
+
+
+def run_classification(df):
+    df_classified, classification_df = dc.classify_demand_patterns(df.copy())
+    classification_df = classification_df.astype({
+        'part_sku': object, 'location_id': object, 'demand_pattern': object
+    })
+    return df_classified, classification_df.set_index(KEYS).sort_index()
+
+
+def assert_same_classification(result, expected):
+    assert list(result.index) == list(expected.index)
+    assert list(result['demand_pattern']) == list(expected['demand_pattern'])
+    for col in ('cv', 'adi'):
+        np.testing.assert_allclose(result[col], expected[col], rtol=1e-6, equal_nan=True)
+    for col in ('total_periods', 'periods_with_demand'):
+        assert list(result[col]) == list(expected[col])
+
+
+@pytest.fixture
+def pandas_only(monkeypatch):
+    monkeypatch.setattr(dc, 'njit', None)
+
+
+def test_pandas_fallback_matches_reference(pandas_only):
+    df = make_frame()
+    _, result = run_classification(df)
+    assert_same_classification(result, reference_classification(df))
+
+
+def test_numba_matches_pandas_fallback(monkeypatch):
+    pytest.importorskip('numba')
+    df = make_frame()
+    _, numba_result = run_classification(df)
+    monkeypatch.setattr(dc, 'njit', None)
+    _, pandas_result = run_classification(df)
+    
+    assert_same_classification(numba_result, pandas_result)
+    for col in ('total_demand', 'mean_demand', 'std_demand', 'zero_demand_ratio'):
+        np.testing.assert_allclose(
+            numba_result[col], pandas_result[col], rtol=1e-6, equal_nan=True
+        )
+
+
+def test_missing_quantities_are_skipped():
+    _, result = run_classification(make_frame())
+    row = result.loc[('B', 'LOC_001')]
+    assert row['total_periods'] == 2
+    assert row['adi'] == pytest.approx(1.0)
+    assert row['cv'] == pytest.approx(0.2)
+    assert row['demand_pattern'] == 'Smooth'
+    assert result.loc[('E', 'LOC_002'), 'demand_pattern'] == 'Unknown'
+
+
+def test_std_is_stable_for_large_values():
+    _, result = run_classification(make_frame())
+    expected = np.std([1e8, 1e8 + 1, 1e8]) / np.mean([1e8, 1e8 + 1, 1e8])
+    assert result.loc[('C', 'LOC_002'), 'cv'] == pytest.approx(expected, rel=1e-6)
+
+
+def test_null_key_records_are_left_unclassified():
+    df_classified, _ = run_classification(make_frame())
+    null_keys = df_classified['part_sku'].isna() | df_classified['location_id'].isna()
+    assert null_keys.sum() == 3
+    assert df_classified.loc[null_keys, 'demand_pattern'].isna().all()
+    assert df_classified.loc[null_keys, ['cv', 'adi']].isna().all().all()
+    assert df_classified.loc[~null_keys, 'demand_pattern'].notna().all()
+
+
+@pytest.fixture
+def pipeline_files(tmp_path, monkeypatch):
+    input_file = tmp_path / 'encoded.csv'
+    make_frame().to_csv(input_file, index=False)
+    monkeypatch.setattr(dc, 'INPUT_FILE', input_file)
+    monkeypatch.setattr(dc, 'OUTPUT_FILE', tmp_path / 'classified.parquet')
+    monkeypatch.setattr(dc, 'CLASSIFICATION_TABLE_FILE', tmp_path / 'table.parquet')
+    monkeypatch.setattr(dc, 'REPORT_FILE', tmp_path / 'report.txt')
+    return tmp_path
+
+
+def test_outputs_are_reused_until_invalidated(pipeline_files):
+    dc.main()
+    signature = dc.classification_signature(dc.INPUT_FILE)
+    assert dc.is_output_current(dc.OUTPUT_FILE, signature)
+    assert sorted(p.name for p in pipeline_files.iterdir()) == [
+        'classified.parquet', 'encoded.csv', 'report.txt'
+    ]
+    
+    # A report from another run does not match
+    dc.REPORT_FILE.write_text(dc.REPORT_FILE.read_text().replace('Run signature', 'Old run'))
+    assert not dc.is_output_current(dc.OUTPUT_FILE, signature)
+
+
+def test_corrupt_output_is_out_of_date(pipeline_files):
+    dc.main()
+    signature = dc.classification_signature(dc.INPUT_FILE)
+    data = dc.OUTPUT_FILE.read_bytes()
+    dc.OUTPUT_FILE.write_bytes(data[:len(data) // 2])
+    assert not dc.is_output_current(dc.OUTPUT_FILE, signature)
+    
+    dc.main()
+    assert dc.is_output_current(dc.OUTPUT_FILE, signature)
+
+
+def test_report_on_empty_input():
+    df = make_frame().iloc[:0]
+    df_classified, classification_df = dc.classify_demand_patterns(df.copy())
+    report = dc.generate_classification_report(classification_df, df_classified)
+    assert 'nan' not in report
+    assert f"{'Smooth':15s}:     0 SKU-Locations ( 0.00%)" in report
+    assert f"{'Smooth':15s}:        0 records ( 0.00%)" in report
+
+
+def test_location_decoding_takes_first_hot_column():
+    df = pd.DataFrame({
+        'date': ['2024-01-01'] * 4,
+        'part_sku': ['A'] * 4,
+        'quantity_sold': [1, 2, 3, 4],
+        'location_id_LOC_002': [0, 1, 0, 1],
+        'location_id_LOC_003': [0, 0, 1, 1],
+    })
+    df_classified, _ = dc.classify_demand_patterns(df)
+    assert list(df_classified['location_id'].astype(object)) == [
+        'LOC_001', 'LOC_002', 'LOC_003', 'LOC_002'
+    ]
+
+
+@pytest.mark.parametrize('one_hot', [False, True])
+def test_streaming_matches_full_classification(tmp_path, one_hot):
+    df = make_frame()
+    if one_hot:
+        df = df[df['location_id'].notna()].reset_index(drop=True)
+        df['location_id_LOC_002'] = (df.pop('location_id') == 'LOC_002').astype(int)
+    path = tmp_path / 'encoded.csv'
+    df.to_csv(path, index=False)
+    
+    # Small blocks so the file is read in several batches
+    streamed = dc.classify_demand_patterns_streaming(path, block_size=64)
+    _, full = dc.classify_demand_patterns(dc.load_dataset(path))
+    
+    streamed, full = (
+        result.astype({'part_sku': object, 'location_id': object, 'demand_pattern': object})
+        .set_index(KEYS).sort_index()
+        for result in (streamed, full)
+    )
+    assert_same_classification(streamed, full)
+    for col in ('total_demand', 'mean_demand', 'std_demand', 'zero_demand_ratio'):
+        np.testing.assert_allclose(streamed[col], full[col], rtol=1e-6, equal_nan=True)
+
+
+def test_streaming_empty_input(tmp_path):
+    path = tmp_path / 'encoded.csv'
+    path.write_text('date,part_sku,quantity_sold,location_id_LOC_002\n')
+    result = dc.classify_demand_patterns_streaming(path)
+    assert len(result) == 0
+    assert list(result.columns) == list(dc.classify_demand_patterns(make_frame())[1].columns)
+
+
+def test_streaming_run_writes_classification_table(pipeline_files):
+    dc.main(streaming=True)
+    signature = dc.classification_signature(dc.INPUT_FILE, streaming=True)
+    assert dc.is_output_current(dc.CLASSIFICATION_TABLE_FILE, signature)
+    assert not dc.OUTPUT_FILE.exists()
+    
+    # A full run rewrites the shared report, so the streaming table is stale
+    dc.main()
+    assert dc.is_output_current(dc.OUTPUT_FILE, dc.classification_signature(dc.INPUT_FILE))
+    assert not dc.is_output_current(dc.CLASSIFICATION_TABLE_FILE, signature)
+
+
+@pytest.mark.parametrize('use_numba', [True, False])
+def test_negative_quantities_are_not_demand(monkeypatch, use_numba):
+    if use_numba:
+        pytest.importorskip('numba')
+    else:
+        monkeypatch.setattr(dc, 'njit', None)
+    df = pd.DataFrame({
+        'date': ['2024-01-01', '2024-01-02'],
+        'part_sku': ['A', 'A'],
+        'location_id': ['LOC_001', 'LOC_001'],
+        'quantity_sold': [3, -2],
+    })
+    _, result = dc.classify_demand_patterns(df)
+    assert result.loc[0, 'periods_with_demand'] == 1
+    assert result.loc[0, 'adi'] == pytest.approx(2.0)
+    assert result.loc[0, 'demand_pattern'] == 'Lumpy'